@@ -1,10 +1,7 @@
 from __future__ import annotations
 
-import time
-import pygame
-
 from datasource import MockSource, FileJSONSource
-from render import launch_frontend, PygameRenderer
+from render import launch_frontend
 
 
 def main():
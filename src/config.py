@@ -93,6 +93,8 @@ TAU = 2 * math.pi
 
 # 实体总量与平滑分裂参数
 MAX_ENTITIES = 120
+# 空间哈希格子尺寸（像素），用于 MockSource 捕食与射线的邻域粗筛
+SPATIAL_CELL_SIZE = 80.0
 SPAWN_GROW_RATE = 0.7     # 分裂后子体半径增长速率（每秒0-1）
 SPAWN_MIN_SCALE = 0.45    # 子体初始半径比例（相对目标半径）
 
@@ -3,36 +3,63 @@ from __future__ import annotations
 import json
 import math
 import os
+import itertools
 import random
-import time
-from dataclasses import asdict
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict, Set
 
-from models import WorldState, EntityState, RayHit
+from models import WorldState, EntityState, RayHit, TYPE_HUNTER, TYPE_PREY
+from spatial import SpatialHash
 import config
 
 
+# 能量衰减速率（每秒）：捕食者消耗更快
+_HUNTER_ENERGY_DECAY = 0.8
+_PREY_ENERGY_DECAY = 0.15
+
+# 边界反弹查表：越界轴数 -> 角速度符号
+_BOUNCE_SIGN = (1.0, -1.0, 1.0)
+_HALF_PI = math.pi / 2
+# 射线预剔除的数值容差（像素平方），避免边界上的浮点误差误删可命中的候选
+_CULL_EPS = 1e-6
+
+
 class DataSource:
     def poll(self) -> Optional[WorldState]:
         raise NotImplementedError
 
 
 class MockSource(DataSource):
-    """用于演示与前端调试的随机数据源。"""
+    """用于演示与前端调试的随机数据源。
+
+    seed: 随机种子；传入后同一参数下的演示过程可复现（默认 None 为随机）。
+    """
 
-    def __init__(self, n_hunters: int = 6, n_prey: int = 18):
+    def __init__(self, n_hunters: int = 6, n_prey: int = 18, seed: Optional[int] = None):
         self.tick = 0
+        # 每个数据源持有独立的随机数生成器，避免共享模块级全局状态，并支持按种子复现
+        self._rng = random.Random(seed)
+        # 子体 id 序号：单调递增计数器，起点避开初始实体的 {类型首字母}_{序号}
+        self._child_seq = itertools.count(max(n_hunters, n_prey))
         self.entities: List[EntityState] = []
+        # 射线偏移角三角函数表缓存：(射线数, 视角) -> (cos 表, sin 表)
+        self._ray_offsets: Dict[Tuple[int, float], Tuple[List[float], List[float]]] = {}
+        # 本帧被吃掉的猎物 id：跨帧复用同一集合，每帧开始时清空
+        self._eaten_ids: Set[str] = set()
+
+        uniform = self._rng.uniform
+        # 按类型查表的初始参数：类型 -> (速度下限, 速度上限, 半径, 视角, 视距)
+        spawn_params = {
+            "hunter": (20.0, 60.0, config.DEFAULT_RADIUS, config.DEFAULT_FOV_DEG_HUNTER, config.DEFAULT_FOV_RANGE_HUNTER),
+            "prey": (15.0, 40.0, config.DEFAULT_RADIUS * 0.9, config.DEFAULT_FOV_DEG_PREY, config.DEFAULT_FOV_RANGE_PREY),
+        }
 
         def spawn_entity(idx: int, etype: str) -> EntityState:
-            x = random.uniform(40, config.WINDOW_WIDTH - 40)
-            y = random.uniform(40, config.WINDOW_HEIGHT - 40)
-            angle = random.uniform(-math.pi, math.pi)
-            speed = random.uniform(20.0, 60.0) if etype == "hunter" else random.uniform(15.0, 40.0)
-            av = random.uniform(-0.8, 0.8)
-            r = config.DEFAULT_RADIUS if etype == "hunter" else config.DEFAULT_RADIUS * 0.9
-            fov_deg = config.DEFAULT_FOV_DEG_HUNTER if etype == "hunter" else config.DEFAULT_FOV_DEG_PREY
-            fov_range = config.DEFAULT_FOV_RANGE_HUNTER if etype == "hunter" else config.DEFAULT_FOV_RANGE_PREY
+            speed_lo, speed_hi, r, fov_deg, fov_range = spawn_params[etype]
+            x = uniform(40, config.WINDOW_WIDTH - 40)
+            y = uniform(40, config.WINDOW_HEIGHT - 40)
+            angle = uniform(-math.pi, math.pi)
+            speed = uniform(speed_lo, speed_hi)
+            av = uniform(-0.8, 0.8)
             return EntityState(
                 id=f"{etype[0]}_{idx}",
                 type=etype,
@@ -42,7 +69,7 @@ class MockSource(DataSource):
                 speed=speed,
                 angular_velocity=av,
                 radius=r,
-                energy=random.uniform(60, 120),
+                energy=uniform(60, 120),
                 digestion=0.0,
                 age=0.0,
                 generation=0,
@@ -59,10 +86,10 @@ class MockSource(DataSource):
     def _spawn_child(self, parent: EntityState, etype: Optional[str] = None):
         # 简化分裂：幅度更小，尽量保持父体的行为模式
         etype = etype or parent.type
-        nid = f"{etype[0]}_{int(time.time()*1000)}_{random.randint(10,99)}"
-        angle = parent.angle + random.uniform(-0.25, 0.25)
-        speed = max(6.0, parent.speed + random.uniform(-2.0, 2.0))
-        r = max(6.0, parent.radius + random.uniform(-0.6, 0.6))
+        nid = f"{etype[0]}_{next(self._child_seq)}"
+        angle = parent.angle + self._rng.uniform(-0.25, 0.25)
+        speed = max(6.0, parent.speed + self._rng.uniform(-2.0, 2.0))
+        r = max(6.0, parent.radius + self._rng.uniform(-0.6, 0.6))
         off = parent.radius * 1.6
         x = clamp(parent.x + math.cos(angle) * off, parent.radius, config.WINDOW_WIDTH - parent.radius)
         y = clamp(parent.y + math.sin(angle) * off, parent.radius, config.WINDOW_HEIGHT - parent.radius)
@@ -73,7 +100,7 @@ class MockSource(DataSource):
             y=y,
             angle=angle,
             speed=speed,
-            angular_velocity=max(-0.8, min(0.8, parent.angular_velocity + random.uniform(-0.2, 0.2))),
+            angular_velocity=max(-0.8, min(0.8, parent.angular_velocity + self._rng.uniform(-0.2, 0.2))),
             radius=r,
             energy=parent.energy * 0.5,
             digestion=0.0,
@@ -90,7 +117,7 @@ class MockSource(DataSource):
         parent.energy *= 0.5
         parent.offspring_count += 1
         # 父体进入繁殖冷却，保证持续分裂但受冷却控制
-        parent.breed_cd = config.BREED_CD_PREY if parent.type == "prey" else config.BREED_CD_HUNTER
+        parent.breed_cd = config.BREED_CD_PREY if parent.type_code == TYPE_PREY else config.BREED_CD_HUNTER
         if len(self.entities) < config.MAX_ENTITIES:
             self.entities.append(child)
 
@@ -110,113 +137,235 @@ class MockSource(DataSource):
         return self._spawn_child(parent, etype=parent.type)
     def _update_motion(self, dt: float):
         # 简单运动学更新（前端演示用）
-        survivors = []
-        for e in self.entities:
+        # 热循环内用到的模块属性先绑定为局部变量，避免每实体重复全局/属性查找
+        cos = math.cos
+        sin = math.sin
+        width = config.WINDOW_WIDTH
+        height = config.WINDOW_HEIGHT
+        # 本帧内不变的量（与 dt 的乘积）只计算一次
+        hunter_decay = _HUNTER_ENERGY_DECAY * dt
+        prey_decay = _PREY_ENERGY_DECAY * dt
+        grow = config.SPAWN_GROW_RATE * dt
+        # 单次遍历同时完成运动更新与按类型分组，后续捕食/繁殖无需再扫描实体列表
+        # 存活实体按写指针原地前移，遍历结束后截断尾部，复用 self.entities 列表本身
+        ents = self.entities
+        w = 0
+        hunters: List[EntityState] = []
+        preys: List[EntityState] = []
+        for e in ents:
             # 能量衰减与年龄增长
-            decay = 0.8 if e.type == "hunter" else 0.15
-            e.energy = max(0.0, e.energy - decay * dt)
+            decay = hunter_decay if e.type_code == TYPE_HUNTER else prey_decay
+            e.energy = max(0.0, e.energy - decay)
             e.age += dt
             # 繁殖冷却递减
-            e.breed_cd = max(0.0, float(getattr(e, "breed_cd", 0.0)) - dt)
-            # 平滑分裂成长（子体半径比例从SPAWN_MIN_SCALE向1.0增长）
-            e.spawn_progress = min(1.0, float(getattr(e, "spawn_progress", 1.0)) + config.SPAWN_GROW_RATE * dt)
+            e.breed_cd = max(0.0, e.breed_cd - dt)
+            # 平滑分裂成长（子体半径比例从SPAWN_MIN_SCALE向1.0增长）：仅渲染使用，已长成的实体跳过
+            if e.spawn_progress < 1.0:
+                e.spawn_progress = min(1.0, e.spawn_progress + grow)
 
             # 运动：猎物在能量为0时原地不动；捕食者能量为0时死亡
-            if e.type == "hunter" and e.energy <= 0:
+            if e.type_code == TYPE_HUNTER and e.energy <= 0:
                 # 捕食者死亡：不加入渲染与后续
                 continue
             else:
                 # 正常/猎物零能量时保持位置
-                if not (e.type == "prey" and e.energy <= 0.0):
+                if not (e.type_code == TYPE_PREY and e.energy <= 0.0):
                     e.angle += e.angular_velocity * dt
-                    e.x += math.cos(e.angle) * e.speed * dt
-                    e.y += math.sin(e.angle) * e.speed * dt
+                    e.x += cos(e.angle) * e.speed * dt
+                    e.y += sin(e.angle) * e.speed * dt
 
-            # 边界反弹（只对运动中的实体）
-            if not (e.type == "prey" and e.energy <= 0.0):
-                if e.x < e.radius or e.x > config.WINDOW_WIDTH - e.radius:
-                    e.angular_velocity *= -1
-                    e.angle += math.pi / 2
-                if e.y < e.radius or e.y > config.WINDOW_HEIGHT - e.radius:
-                    e.angular_velocity *= -1
-                    e.angle += math.pi / 2
+                    # 边界反弹（只对运动中的实体）：统计越界轴数 0/1/2，
+                    # 每越一轴角速度取反一次、朝向转 90°，角落处两次取反相互抵消
+                    r = e.radius
+                    flips = (e.x < r or e.x > width - r) + (e.y < r or e.y > height - r)
+                    e.angular_velocity *= _BOUNCE_SIGN[flips]
+                    e.angle += flips * _HALF_PI
 
-            survivors.append(e)
+            ents[w] = e
+            w += 1
+            if e.type_code == TYPE_HUNTER:
+                hunters.append(e)
+            elif e.type_code == TYPE_PREY:
+                preys.append(e)
 
-        self.entities = survivors
+        del ents[w:]
 
         # 偶发“猎人捕食猎物”事件（仅前端展示）；吃后可分裂
-        hunters = [x for x in self.entities if x.type == "hunter"]
-        preys = [x for x in self.entities if x.type == "prey"]
+        # 猎物按网格分桶，每个捕食者只检查邻近格子内的猎物
+        prey_xs = [p.x for p in preys]
+        prey_ys = [p.y for p in preys]
+        prey_grid = SpatialHash(config.SPATIAL_CELL_SIZE)
+        prey_grid.rebuild(prey_xs, prey_ys)
         # 记录被吃掉的猎物，事后移除
-        eaten_ids = set()
+        eaten_ids = self._eaten_ids
+        eaten_ids.clear()
         for h in hunters:
-            near = [p for p in preys if (p.x - h.x) ** 2 + (p.y - h.y) ** 2 < (h.fov_range * 0.2) ** 2]
-            if near and h.digestion <= 0:
-                target = random.choice(near)
+            # 消化中的捕食者不会进食：跳过邻域查询与距离判定
+            near = None
+            if h.digestion <= 0:
+                # 捕食半径在本帧内不变：每个捕食者只计算一次半径及其平方
+                hx, hy = h.x, h.y
+                pred_r = h.fov_range * 0.2
+                pred_r2 = pred_r ** 2
+                # 距离判定直接读取猎物坐标列，避免逐对象属性访问
+                near = [
+                    preys[j]
+                    for j in prey_grid.query(hx, hy, pred_r)
+                    if (prey_xs[j] - hx) ** 2 + (prey_ys[j] - hy) ** 2 < pred_r2
+                ]
+            if near:
+                target = self._rng.choice(near)
                 h.energy = min(160.0, h.energy + 50.0)
                 h.digestion = 3.5  # 消化时间
                 # 被吃的猎物立即消失
                 eaten_ids.add(target.id)
             else:
                 h.digestion = max(0.0, h.digestion - dt)
-            if h.breed_cd <= 0.0 and h.energy > h.split_energy and random.random() < 0.05:
+            if h.breed_cd <= 0.0 and h.energy > h.split_energy and self._rng.random() < 0.05:
                 self._spawn_child(h, etype="hunter")
 
         if eaten_ids:
-            self.entities = [e for e in self.entities if e.id not in eaten_ids]
+            w = 0
+            for e in ents:
+                if e.id not in eaten_ids:
+                    ents[w] = e
+                    w += 1
+            del ents[w:]
+            # 同步更新本帧缓存的猎物列表，被吃掉的猎物不再参与繁殖
+            preys = [p for p in preys if p.id not in eaten_ids]
 
         # 猎物分裂：生存时间够久或能量达到分裂阈值
+        # 剩余容量用计数器维护；达到上限后直接结束扫描，不再做无意义的判定与随机抽样
+        room = config.MAX_ENTITIES - len(self.entities)
+        rand = self._rng.random
         for p in preys:
-            if p.breed_cd <= 0.0 and (p.age > 8.0 or (p.energy > p.split_energy and random.random() < 0.12)):
-                if len(self.entities) < config.MAX_ENTITIES:
-                    self._spawn_child(p, etype="prey")
+            if room <= 0:
+                break
+            if p.breed_cd <= 0.0 and (p.age > 8.0 or (p.energy > p.split_energy and rand() < 0.12)):
+                self._spawn_child(p, etype="prey")
+                room -= 1
+
+    def _ray_offset_table(self, count: int, fov_deg: float) -> Tuple[List[float], List[float]]:
+        """射线相对朝向的固定偏移角的 cos/sin 表，按 (射线数, 视角) 缓存。"""
+        key = (count, fov_deg)
+        table = self._ray_offsets.get(key)
+        if table is None:
+            half = math.radians(fov_deg) / 2.0
+            step = (half * 2) / max(1, count - 1)
+            offsets = [-half + i * step for i in range(count)]
+            table = ([math.cos(o) for o in offsets], [math.sin(o) for o in offsets])
+            self._ray_offsets[key] = table
+        return table
+
+    def _snapshot_columns(self) -> Tuple[List[float], List[float], List[float], List[str], List[str]]:
+        """将实体字段按列摊平（SoA）：每帧构建一次，供全部射线计算共享。"""
+        ents = self.entities
+        return (
+            [o.x for o in ents],
+            [o.y for o in ents],
+            [o.radius * o.radius for o in ents],
+            [o.type for o in ents],
+            [o.id for o in ents],
+        )
 
-    def _compute_rays(self, e: EntityState) -> List[RayHit]:
+    def _compute_rays(
+        self,
+        e: EntityState,
+        columns: Optional[Tuple] = None,
+        grid: Optional[SpatialHash] = None,
+        self_idx: Optional[int] = None,
+    ) -> List[RayHit]:
         # 如果后端不提供，前端近似计算射线与最近碰撞
-        rays: List[RayHit] = []
+        # self_idx: e 在实体列中的下标，用于整数比较跳过自身；未给出时按对象身份查找
+        if columns is None:
+            columns = self._snapshot_columns()
+        if self_idx is None:
+            self_idx = next((j for j, o in enumerate(self.entities) if o is e), -1)
+        xs, ys, r2s, types, ids = columns
         count = config.DEFAULT_RAY_COUNT
+        # 复用实体上一帧的 RayHit 对象（原地改写字段），避免每帧每射线重新分配
+        rays = e.rays
+        if len(rays) != count:
+            rays = [RayHit(angle=0.0, distance=0.0) for _ in range(count)]
         half = math.radians(e.fov_deg) / 2.0
         start = e.angle - half
         step = (half * 2) / max(1, count - 1)
+        # 射线方向 = 朝向旋转固定偏移：cos(a+b)=cos(a)cos(b)-sin(a)sin(b)，每实体只需一次三角函数
+        off_cos, off_sin = self._ray_offset_table(count, e.fov_deg)
+        ca = math.cos(e.angle)
+        sa = math.sin(e.angle)
+        # 每个实体只收集一次其他实体的相对坐标与半径平方，射线循环内仅做纯算术
+        # 有网格时只收集视距范围内的候选（粗筛），否则全量遍历
+        ex, ey = e.x, e.y
+        cands = grid.query(ex, ey, e.fov_range) if grid is not None else range(len(xs))
+        # FOV 预剔除：任何射线都不可能命中的候选在射线循环前一次性丢弃
+        # - 距离：命中要求 proj < fov_range 且垂距 <= r，故中心距离平方须 < fov_range^2 + r^2
+        # - 视锥：视角 < 180° 时，圆须与两条边缘射线所夹的楔形（外扩 r）相交
+        fov2 = e.fov_range * e.fov_range
+        cone = half < _HALF_PI
+        # 边缘射线方向（与第 0 条 / 最后一条射线方向一致）
+        rx = ca * off_cos[0] - sa * off_sin[0]
+        ry = sa * off_cos[0] + ca * off_sin[0]
+        lx = ca * off_cos[-1] - sa * off_sin[-1]
+        ly = sa * off_cos[-1] + ca * off_sin[-1]
+        others = []
+        for j in cands:
+            if j == self_idx:
+                continue
+            ox = xs[j] - ex
+            oy = ys[j] - ey
+            r2 = r2s[j]
+            slack = r2 + _CULL_EPS
+            if ox * ox + oy * oy > fov2 + slack:
+                continue
+            if cone:
+                # 在右边缘左侧（叉积 >= -r）且在左边缘右侧（叉积 <= r）
+                cr = rx * oy - ry * ox
+                if cr < 0.0 and cr * cr > slack:
+                    continue
+                cl = lx * oy - ly * ox
+                if cl > 0.0 and cl * cl > slack:
+                    continue
+            others.append((ox, oy, r2, types[j], ids[j]))
         for i in range(count):
             a = start + i * step
+            # 射线参数化：e -> e + t * dir（方向每条射线只算一次）
+            dx = ca * off_cos[i] - sa * off_sin[i]
+            dy = sa * off_cos[i] + ca * off_sin[i]
             min_dist = e.fov_range
             hit_type = None
             hit_id = None
             # 与其他实体圆形近似碰撞
-            for o in self.entities:
-                if o.id == e.id:
-                    continue
-                # 射线参数化：e -> e + t * dir
-                dx = math.cos(a)
-                dy = math.sin(a)
-                ox = o.x - e.x
-                oy = o.y - e.y
-                # 最近点到圆中心的距离（几何近似）
+            for ox, oy, r2, otype, oid in others:
+                # 投影须在 (0, min_dist) 内才可能成为更近的命中
                 proj = ox * dx + oy * dy
-                if proj < 0:
+                if proj <= 0 or proj >= min_dist:
                     continue
+                # 最近点到圆中心的距离（几何近似）
                 closest_x = ox - proj * dx
                 closest_y = oy - proj * dy
-                d2 = closest_x ** 2 + closest_y ** 2
-                if d2 <= o.radius ** 2:
-                    # 命中，计算沿射线的距离
-                    dist = proj
-                    if 0 < dist < min_dist:
-                        min_dist = dist
-                        hit_type = o.type
-                        hit_id = o.id
-            rays.append(RayHit(angle=a, distance=min_dist, hit_type=hit_type, hit_id=hit_id))
+                if closest_x * closest_x + closest_y * closest_y <= r2:
+                    # 命中，沿射线的距离取投影长度
+                    min_dist = proj
+                    hit_type = otype
+                    hit_id = oid
+            ray = rays[i]
+            ray.angle = a
+            ray.distance = min_dist
+            ray.hit_type = hit_type
+            ray.hit_id = hit_id
         return rays
 
     def poll(self) -> Optional[WorldState]:
         self.tick += 1
         dt = 1 / 60.0
         self._update_motion(dt)
-        # 更新射线
-        for e in self.entities:
-            e.rays = self._compute_rays(e)
+        # 更新射线（实体列快照与空间网格每帧只构建一次）
+        columns = self._snapshot_columns()
+        grid = SpatialHash(config.SPATIAL_CELL_SIZE)
+        grid.rebuild(columns[0], columns[1], max_extent=math.sqrt(max(columns[2], default=0.0)))
+        for i, e in enumerate(self.entities):
+            e.rays = self._compute_rays(e, columns, grid, i)
             e.iteration = self.tick
         return WorldState(tick=self.tick, entities=self.entities)
 
@@ -6,8 +6,13 @@ from typing import List, Optional, Literal, Dict
 
 EntityType = Literal["hunter", "prey"]
 
+# 实体类型的整数编码（-1 表示未知类型）：热循环中以整数比较替代字符串比较
+TYPE_HUNTER = 0
+TYPE_PREY = 1
+TYPE_CODES: Dict[str, int] = {"hunter": TYPE_HUNTER, "prey": TYPE_PREY}
 
-@dataclass
+
+@dataclass(slots=True)
 class RayHit:
     angle: float
     distance: float
@@ -34,7 +39,8 @@ class Event:
     child: Optional[Dict] = None  # 子体的基本字段（id/type/x/y/angle/radius等）
 
 
-@dataclass
+# 使用 __slots__：实体每帧被大量属性访问，槽位比 __dict__ 更省内存、访问更快
+@dataclass(slots=True)
 class EntityState:
     id: str
     type: EntityType
@@ -69,6 +75,11 @@ class EntityState:
     should_persist: bool = False
     lifespan: Optional[float] = None  # 预留寿命（秒），None表示不限制
     saved: bool = False
+    # 由 type 派生的整数编码，构造时自动填充（不参与构造参数与比较）
+    type_code: int = field(default=-1, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.type_code = TYPE_CODES.get(self.type, -1)
 
 
 @dataclass
@@ -83,35 +94,40 @@ class WorldState:
     def from_dict(payload: Dict) -> "WorldState":
         tick = int(payload.get("tick", 0))
         entities: List[EntityState] = []
+        # 热循环内的方法解析提前绑定为局部变量：每个字段只做一次 dict.get 调用
+        append = entities.append
         for e in payload.get("entities", []):
-            rays = [RayHit(**r) for r in e.get("rays", [])]
-            entities.append(
+            get = e.get
+            rays = [RayHit(**r) for r in get("rays", [])]
+            fov_deg = get("fov_deg")
+            fov_range = get("fov_range")
+            append(
                 EntityState(
-                    id=str(e.get("id")),
-                    type=str(e.get("type")),
-                    x=float(e.get("x", 0.0)),
-                    y=float(e.get("y", 0.0)),
-                    angle=float(e.get("angle", 0.0)),
-                    speed=float(e.get("speed", 0.0)),
-                    angular_velocity=float(e.get("angular_velocity", 0.0)),
-                    radius=float(e.get("radius", 10.0)),
-                    energy=float(e.get("energy", 100.0)),
-                    digestion=float(e.get("digestion", 0.0)),
-                    age=float(e.get("age", 0.0)),
-                    generation=int(e.get("generation", 0)),
-                    offspring_count=int(e.get("offspring_count", 0)),
+                    id=str(get("id")),
+                    type=str(get("type")),
+                    x=float(get("x", 0.0)),
+                    y=float(get("y", 0.0)),
+                    angle=float(get("angle", 0.0)),
+                    speed=float(get("speed", 0.0)),
+                    angular_velocity=float(get("angular_velocity", 0.0)),
+                    radius=float(get("radius", 10.0)),
+                    energy=float(get("energy", 100.0)),
+                    digestion=float(get("digestion", 0.0)),
+                    age=float(get("age", 0.0)),
+                    generation=int(get("generation", 0)),
+                    offspring_count=int(get("offspring_count", 0)),
                     # 若后端提供，则使用；否则由前端按类型配置
-                    fov_deg=(float(e["fov_deg"]) if e.get("fov_deg") is not None else None),
-                    fov_range=(float(e["fov_range"]) if e.get("fov_range") is not None else None),
+                    fov_deg=(float(fov_deg) if fov_deg is not None else None),
+                    fov_range=(float(fov_range) if fov_range is not None else None),
                     rays=rays,
-                    split_energy=float(e.get("split_energy", 120.0)),
-                    target_id=e.get("target_id"),
-                    iteration=int(e.get("iteration", tick)),
-                    breed_cd=float(e.get("breed_cd", 0.0)),
-                    spawn_progress=float(e.get("spawn_progress", 1.0)),
-                    should_persist=bool(e.get("should_persist", False)),
-                    lifespan=e.get("lifespan"),
-                    saved=bool(e.get("saved", False)),
+                    split_energy=float(get("split_energy", 120.0)),
+                    target_id=get("target_id"),
+                    iteration=int(get("iteration", tick)),
+                    breed_cd=float(get("breed_cd", 0.0)),
+                    spawn_progress=float(get("spawn_progress", 1.0)),
+                    should_persist=bool(get("should_persist", False)),
+                    lifespan=get("lifespan"),
+                    saved=bool(get("saved", False)),
                 )
             )
         events = [Event(**ev) for ev in payload.get("events", [])]
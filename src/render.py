@@ -10,13 +10,25 @@ from types import SimpleNamespace
 import pygame
 
 import config
-from models import WorldState, EntityState, EntityType, RayHit
+from models import WorldState, EntityState, EntityType, RayHit, TYPE_CODES, TYPE_HUNTER, TYPE_PREY
+from spatial import SpatialHash
 
 # 统一日志（可由宿主程序覆盖配置）
 logger = logging.getLogger(__name__)
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
+# FOV 参数记忆化缓存的条目上限（后端逐实体给出不同 FOV 时防止无界增长）
+_FOV_CACHE_MAX = 1024
+# 文本表面缓存的条目上限（逐帧变化的数值行会不断产生新键，满后整体清空）
+_TEXT_CACHE_MAX = 256
+# FOV 显示模式切换表：当前模式 -> (下一模式, 是否重置视距缩放)
+_FOV_MODE_NEXT: Dict[str, Tuple[str, bool]] = {
+    "wedge": ("lines", True),
+    "lines": ("off", False),
+    "off": ("wedge", True),
+}
+
 
 class RendererError(Exception):
     """前端渲染器致命错误，要求宿主程序进行兜底处理或退出。"""
@@ -57,6 +69,15 @@ class PygameRenderer:
         self._soft_vels: Dict[str, list[float]] = {}
         # 软体开关（保留为始终开启，移除水滴模式）
         self._soft_enabled: bool = True
+        # 软体参数在初始化时一次性读取，避免每实体每帧重复 getattr(config, ...)
+        self._soft_nodes: int = max(8, int(getattr(config, "SOFT_BODY_NODES", 24)))
+        self._soft_k: float = float(getattr(config, "SOFT_BODY_SPRING_K", 12.0))
+        self._soft_damping: float = float(getattr(config, "SOFT_BODY_DAMPING", 8.0))
+        self._soft_head_compress: float = float(getattr(config, "SOFT_BODY_HEAD_COMPRESS", 0.08))
+        self._soft_tail_elongate: float = float(getattr(config, "SOFT_BODY_TAIL_ELONGATE", 0.12))
+        self._soft_wobble_base: float = float(getattr(config, "SOFT_BODY_WOBBLE_BASE", 0.05))
+        self._soft_wobble_ang: float = float(getattr(config, "SOFT_BODY_WOBBLE_ANG", 0.04))
+        self._body_alpha: int = int(getattr(config, "BODY_ALPHA", 180))
 
         # 可调参数
         self._ray_count_delta = 0
@@ -76,9 +97,31 @@ class PygameRenderer:
         # 子代/父代兜底统计（后端未提供实体字段时基于事件推导）
         self._gen_fallback: Dict[str, int] = {}
         self._offspring_fallback: Dict[str, int] = {}
+        # 离屏世界图层：首次绘制时按需创建，之后逐帧复用
+        self._world_layer: Optional[pygame.Surface] = None
+        # 调试面板与传感器条背景：同样按需创建后复用
+        self._debug_panel: Optional[pygame.Surface] = None
+        self._sensor_panel: Optional[pygame.Surface] = None
+        # 已渲染文本表面缓存：(文本, 颜色) -> Surface
+        self._text_cache: Dict[Tuple[str, Any], pygame.Surface] = {}
+        # 视线回退（最近实体）查询所用的空间网格，逐帧重建复用
+        self._nearest_grid = SpatialHash(config.SPATIAL_CELL_SIZE)
         # 全局相机状态
         self._cam_zoom: float = 1.0
         self._cam_lerp: float = float(getattr(config, "CAMERA_LERP", 0.18))
+        self._cam_zoom_selected: float = float(getattr(config, "CAMERA_ZOOM_SELECTED", 1.8))
+        # 可选配置项同样在初始化时读取一次：FOV 来源开关与幽灵回放半径
+        self._use_entity_fov: bool = bool(getattr(config, "USE_ENTITY_FOV", True))
+        # 按类型码查表的默认 FOV（视角, 视距）；未知类型与原逻辑一致按猎物处理
+        self._default_fov_prey: Tuple[float, float] = (config.PREY_FOV_DEG, config.PREY_FOV_RANGE)
+        self._default_fov: Dict[int, Tuple[float, float]] = {
+            TYPE_HUNTER: (config.HUNTER_FOV_DEG, config.HUNTER_FOV_RANGE),
+            TYPE_PREY: self._default_fov_prey,
+        }
+        # FOV 参数记忆化缓存与已告警（缺失FOV）的实体 id
+        self._fov_cache: Dict[Tuple[int, Optional[float], Optional[float], float], Tuple[float, float]] = {}
+        self._fov_missing_logged: set[str] = set()
+        self._ghost_radius: float = getattr(config, "DEFAULT_RADIUS", 10.0)
 
         # 性能与异常监控
         self._last_dt_sec: float = 0.0
@@ -183,16 +226,30 @@ class PygameRenderer:
             # 返回False以传播异常给宿主处理
             return False
 
+    def _render_text(self, text: str, color) -> pygame.Surface:
+        """渲染文本并按 (文本, 颜色) 缓存：内容未变化的行直接复用已渲染的表面。"""
+        key = (text, color)
+        img = self._text_cache.get(key)
+        if img is None:
+            if len(self._text_cache) >= _TEXT_CACHE_MAX:
+                self._text_cache.clear()
+            img = self.font.render(text, True, color)
+            self._text_cache[key] = img
+        return img
+
     def _color_for(self, e: EntityState):
-        return config.HUNTER_COLOR if e.type == "hunter" else config.PREY_COLOR
+        return config.HUNTER_COLOR if e.type_code == TYPE_HUNTER else config.PREY_COLOR
 
     def _fov_params(self, e: EntityState) -> Tuple[float, float]:
-        """根据配置决定使用实体内置FOV或默认FOV；实体缺失属性时打印错误并回退。"""
-        use_entity = bool(getattr(config, "USE_ENTITY_FOV", True))
-        if use_entity:
+        """根据配置决定使用实体内置FOV或默认FOV；实体缺失属性时打印错误并回退。
+
+        结果按 (类型码, fov_deg, fov_range, 视距缩放) 记忆化；缺失告警每个实体只打印一次。
+        """
+        if self._use_entity_fov:
             deg = e.fov_deg
             rng = e.fov_range
-            if deg is None or rng is None:
+            if (deg is None or rng is None) and e.id not in self._fov_missing_logged:
+                self._fov_missing_logged.add(e.id)
                 missing = []
                 if deg is None:
                     missing.append("fov_deg")
@@ -203,21 +260,21 @@ class PygameRenderer:
                 except Exception:
                     # logger 出错时不阻断渲染
                     pass
-                if e.type == "hunter":
-                    deg = config.HUNTER_FOV_DEG
-                    rng = config.HUNTER_FOV_RANGE
-                else:
-                    deg = config.PREY_FOV_DEG
-                    rng = config.PREY_FOV_RANGE
         else:
-            if e.type == "hunter":
-                deg = config.HUNTER_FOV_DEG
-                rng = config.HUNTER_FOV_RANGE
-            else:
-                deg = config.PREY_FOV_DEG
-                rng = config.PREY_FOV_RANGE
+            # 不使用实体FOV时结果只取决于类型
+            deg = rng = None
+        key = (e.type_code, deg, rng, self._fov_range_scale)
+        cached = self._fov_cache.get(key)
+        if cached is not None:
+            return cached
+        if deg is None or rng is None:
+            deg, rng = self._default_fov.get(e.type_code, self._default_fov_prey)
         rng = float(rng) * self._fov_range_scale
-        return float(deg), float(rng)
+        cached = (float(deg), float(rng))
+        if len(self._fov_cache) >= _FOV_CACHE_MAX:
+            self._fov_cache.clear()
+        self._fov_cache[key] = cached
+        return cached
 
     def _draw_sensor_strip(self, e: EntityState):
         """在屏幕右上角绘制“单一展示框”，包含类别说明文本与传感器条。"""
@@ -250,20 +307,26 @@ class PygameRenderer:
         x0 = screen_w - container_w - margin
         y0 = margin
         # 背景与整体边框（统一框）
-        panel = pygame.Surface((container_w, h), pygame.SRCALPHA)
-        panel.fill((30, 32, 40, 120))
+        # 背景面板按尺寸缓存：射线数与字体不变时逐帧复用，尺寸变化才重建
+        panel = self._sensor_panel
+        if panel is None or panel.get_size() != (container_w, h):
+            panel = pygame.Surface((container_w, h), pygame.SRCALPHA)
+            panel.fill((30, 32, 40, 120))
+            self._sensor_panel = panel
         self.screen.blit(panel, (x0, y0))
         pygame.draw.rect(self.screen, (180, 180, 190), pygame.Rect(x0, y0, container_w, h), 1)
 
         # 逐个 ray 绘制方块（纵向柱），位于展示框右侧
         strip_x = x0 + legend_w + container_gap
+        # 命中类别 → 颜色：未命中/未知类型为 null，与自身同类为 same，其余为 different
+        own_type = e.type
         for i, r in enumerate(e.rays):
-            color = config.SENSOR_EMPTY
-            if r.hit_type == "hunter" and e.type == "hunter":
-                color = config.SENSOR_SAME
-            elif r.hit_type == "prey" and e.type == "prey":
+            ht = r.hit_type
+            if ht not in TYPE_CODES:
+                color = config.SENSOR_EMPTY
+            elif ht == own_type:
                 color = config.SENSOR_SAME
-            elif r.hit_type in ("hunter", "prey"):
+            else:
                 color = config.SENSOR_OTHER
             cy = y0 + gap + i * (cell + gap)
             rect = pygame.Rect(strip_x + gap, cy, cell, cell)
@@ -279,7 +342,7 @@ class PygameRenderer:
             row_y = lg_y + gap + i * (cell + gap)
             swatch = pygame.Rect(lg_x + gap, row_y, cell, cell)
             pygame.draw.rect(self.screen, color, swatch)
-            text_img = self.font.render(label, True, (220, 220, 228))
+            text_img = self._render_text(label, (220, 220, 228))
             # 文本起点：色块右侧加偏移，确保不出框
             tx = lg_x + gap + cell + 6
             self.screen.blit(text_img, (tx, row_y - 1))
@@ -322,7 +385,7 @@ class PygameRenderer:
     # 仅保留软体实现（已删除水滴相关函数与效果）
 
     def _ensure_soft_state(self, e_id: str, r: float):
-        n = max(8, int(getattr(config, "SOFT_BODY_NODES", 24)))
+        n = self._soft_nodes
         if e_id not in self._soft_radii or len(self._soft_radii[e_id]) != n:
             self._soft_radii[e_id] = [r for _ in range(n)]
             self._soft_vels[e_id] = [0.0 for _ in range(n)]
@@ -336,7 +399,7 @@ class PygameRenderer:
         min_s = 0.35
         ref_s = 3.0
         s = clamp(e.speed / ref_s, 0.0, 1.0)
-        n = max(8, int(getattr(config, "SOFT_BODY_NODES", 24)))
+        n = self._soft_nodes
         self._ensure_soft_state(e.id, r)
         radii = self._soft_radii[e.id]
         vels = self._soft_vels[e.id]
@@ -348,27 +411,21 @@ class PygameRenderer:
                 vels[i] = 0.0
             d = int(r * 2)
             surf = pygame.Surface((d, d), pygame.SRCALPHA)
-            pygame.draw.circle(surf, (*color, getattr(config, "BODY_ALPHA", 180)), (int(d/2), int(d/2)), int(r))
+            pygame.draw.circle(surf, (*color, self._body_alpha), (int(d/2), int(d/2)), int(r))
             rect = surf.get_rect(center=(int(x), int(y)))
             self.screen.blit(surf, rect)
             return
 
-        # 目标形变参数（避免“分离/花生形”）：改为加性形变并使用平滑权重
-        major_scale = 1.0 + 0.42 * s
-        minor_scale = 1.0 - 0.26 * s
-        head_c = getattr(config, "SOFT_BODY_HEAD_COMPRESS", 0.14) * s
-        tail_e = getattr(config, "SOFT_BODY_TAIL_ELONGATE", 0.18) * s
-        wobble_base = getattr(config, "SOFT_BODY_WOBBLE_BASE", 0.08) * r
-        wobble_ang = getattr(config, "SOFT_BODY_WOBBLE_ANG", 0.06) * r * min(1.0, abs(e.angular_velocity))
-        # 参数二次收敛：降低形变幅度以减少分离现象
+        # 目标形变参数（避免“分离/花生形”）：改为加性形变并使用平滑权重，
+        # 形变幅度已收敛到较低水平以减少分离现象
         major_scale = 1.0 + 0.22 * s
         minor_scale = 1.0 - 0.10 * s
-        head_c = getattr(config, "SOFT_BODY_HEAD_COMPRESS", 0.08) * s
-        tail_e = getattr(config, "SOFT_BODY_TAIL_ELONGATE", 0.12) * s
-        wobble_base = getattr(config, "SOFT_BODY_WOBBLE_BASE", 0.05) * r
-        wobble_ang = getattr(config, "SOFT_BODY_WOBBLE_ANG", 0.04) * r * min(1.0, abs(e.angular_velocity))
-        k = float(getattr(config, "SOFT_BODY_SPRING_K", 12.0))
-        dmp = float(getattr(config, "SOFT_BODY_DAMPING", 8.0))
+        head_c = self._soft_head_compress * s
+        tail_e = self._soft_tail_elongate * s
+        wobble_base = self._soft_wobble_base * r
+        wobble_ang = self._soft_wobble_ang * r * min(1.0, abs(e.angular_velocity))
+        k = self._soft_k
+        dmp = self._soft_damping
         dt = max(1.0/60.0, self._last_dt_sec)
         t = pygame.time.get_ticks() / 1000.0
 
@@ -398,10 +455,7 @@ class PygameRenderer:
             dv = (target - radii[i]) * k * dt - vels[i] * dmp * dt
             vels[i] += dv
             radii[i] += vels[i] * dt
-            # 简单约束避免过度形变
-            # 约束避免过度变窄或过长导致视觉分离
-            radii[i] = clamp(radii[i], r * 0.75, r * 1.9)
-            # 二次约束：进一步收紧范围以保证连续性
+            # 约束避免过度变窄或过长导致视觉分离，收紧范围以保证连续性
             radii[i] = clamp(radii[i], r * 0.88, r * 1.5)
 
             px = int(x + math.cos(phi) * radii[i])
@@ -417,7 +471,7 @@ class PygameRenderer:
         h = max_y - min_y + 8
         surf = pygame.Surface((w, h), pygame.SRCALPHA)
         local_pts = [(p[0] - min_x + 4, p[1] - min_y + 4) for p in points]
-        pygame.draw.polygon(surf, (*color, getattr(config, "BODY_ALPHA", 180)), local_pts)
+        pygame.draw.polygon(surf, (*color, self._body_alpha), local_pts)
         self.screen.blit(surf, (min_x - 4, min_y - 4))
 
     def _draw_swallow_band(self, x: float, y: float, move_a: float, r: float, prog: float, amp: float):
@@ -447,7 +501,7 @@ class PygameRenderer:
         self._tick_swallow.clear()
         # 后端计数（若提供）优先
         try:
-            if getattr(world, "counters", None) and isinstance(world.counters, dict):
+            if world.counters and isinstance(world.counters, dict):
                 self._stats["predations"] = int(world.counters.get("predations", self._stats.get("predations", 0)))
                 self._stats["births"] = int(world.counters.get("births", self._stats.get("births", 0)))
                 pk = world.counters.get("predator_kills")
@@ -460,13 +514,15 @@ class PygameRenderer:
                             continue
         except Exception:
             pass
+        # 父代查找表：仅在首次需要时构建，整帧复用（逆序构建，重复 id 时保留首个，与线性查找一致）
+        by_id: Optional[Dict[str, EntityState]] = None
         # 逐事件处理
-        for ev in getattr(world, "events", []) or []:
-            ev_type = getattr(ev, "type", None)
+        for ev in world.events or []:
+            ev_type = ev.type
             if ev_type == "predation":
-                actor_id = getattr(ev, "actor_id", None)
+                actor_id = ev.actor_id
                 if actor_id:
-                    gain = float(getattr(ev, "energy_gain", 1.0) or 1.0)
+                    gain = float(ev.energy_gain or 1.0)
                     # 吞咽带与喂食脉冲
                     self._feed_pulse[actor_id] = min(config.FEED_PULSE_MAX, self._feed_pulse.get(actor_id, 0.0) + gain * config.FEED_PULSE_GAIN)
                     self._swallow_prog[actor_id] = 1.0
@@ -476,7 +532,7 @@ class PygameRenderer:
                     # 按捕食者统计击杀次数
                     self._predation_count[actor_id] = self._predation_count.get(actor_id, 0) + 1
             elif ev_type == "breed":
-                child = getattr(ev, "child", None)
+                child = ev.child
                 cid = None
                 if isinstance(child, dict):
                     cid = child.get("id")
@@ -485,13 +541,15 @@ class PygameRenderer:
                     self._spawn_override[cid] = 0.0
                     self._stats["births"] = self._stats.get("births", 0) + 1
                 # 兜底父代/子代统计：累加父亲的子代数，推导子代代数
-                parent_id = getattr(ev, "parent_id", None)
+                parent_id = ev.parent_id
                 if not parent_id and isinstance(child, dict):
                     parent_id = child.get("parent_id")
                 if parent_id:
                     self._offspring_fallback[parent_id] = self._offspring_fallback.get(parent_id, 0) + 1
                     if cid:
-                        parent = next((e for e in world.entities if e.id == parent_id), None)
+                        if by_id is None:
+                            by_id = {e.id: e for e in reversed(world.entities)}
+                        parent = by_id.get(parent_id)
                         if parent is not None:
                             self._gen_fallback[cid] = max(self._gen_fallback.get(cid, 0), int(parent.generation) + 1)
 
@@ -501,14 +559,14 @@ class PygameRenderer:
         # 平滑分裂缩放：render半径随spawn_progress从小到大
         base_r = e.radius
         # 优先使用事件驱动的成长覆盖，其次使用后端提供的spawn_progress
-        sp = self._spawn_override.get(e.id, float(getattr(e, "spawn_progress", 1.0)))
+        sp = self._spawn_override.get(e.id, e.spawn_progress)
         scale = config.SPAWN_MIN_SCALE + (1.0 - config.SPAWN_MIN_SCALE) * sp
         r = base_r * scale
         # 基于运动方向的拉伸角度
         px, py = self._prev_draw.get(e.id, (x, y))
         mvx, mvy = (x - px), (y - py)
-        mvlen = math.hypot(mvx, mvy)
-        move_a = math.atan2(mvy, mvx) if mvlen > 0.3 else a
+        # 位移阈值 0.3 像素：比较平方长度，免去开方
+        move_a = math.atan2(mvy, mvx) if mvx * mvx + mvy * mvy > 0.09 else a
 
         # 主体仅为软体，无水滴拖影
 
@@ -548,30 +606,31 @@ class PygameRenderer:
         # 双眼与瞳孔（看向最近实体；距离影响瞳孔大小）
         pupil = clamp(1.0 - gaze_dist / max(1.0, fov_range), 0.1, 0.9)
         eye_r = r * config.EYE_RADIUS_SCALE
-        # 双眼位置：沿运动方向前移，再左右分离
-        fx = math.cos(move_a) * (r * config.EYE_FORWARD_SCALE)
-        fy = math.sin(move_a) * (r * config.EYE_FORWARD_SCALE)
-        perp_x = -math.sin(move_a) * (r * config.EYE_SEP_SCALE)
-        perp_y = math.cos(move_a) * (r * config.EYE_SEP_SCALE)
+        # 双眼位置：沿运动方向前移，再左右分离（运动方向的 cos/sin 只算一次）
+        cos_m = math.cos(move_a)
+        sin_m = math.sin(move_a)
+        fx = cos_m * (r * config.EYE_FORWARD_SCALE)
+        fy = sin_m * (r * config.EYE_FORWARD_SCALE)
+        perp_x = -sin_m * (r * config.EYE_SEP_SCALE)
+        perp_y = cos_m * (r * config.EYE_SEP_SCALE)
         left_eye = (x + fx - perp_x, y + fy - perp_y)
         right_eye = (x + fx + perp_x, y + fy + perp_y)
+        # 瞳孔偏移方向对双眼相同：仅在视野(FOV)范围内偏移，循环外计算一次
+        gx, gy = gaze_dir
+        ga = math.atan2(gy, gx)
+        half = math.radians(fov_deg) / 2.0
+        # 将方向角限制到 [a-half, a+half]
+        diff = (ga - a + math.pi) % (2 * math.pi) - math.pi
+        if diff > half:
+            ga = a + half
+        elif diff < -half:
+            ga = a - half
+        ox = math.cos(ga) * (eye_r * 0.35)
+        oy = math.sin(ga) * (eye_r * 0.35)
+        pupil_sz = int(eye_r * max(config.PUPIL_MIN, min(config.PUPIL_MAX, config.PUPIL_SCALE_BASE * pupil)))
         for cx, cy in (left_eye, right_eye):
             pygame.draw.circle(self.screen, config.EYE_WHITE, (int(cx), int(cy)), int(eye_r))
-            # 仅在视野(FOV)范围内偏移瞳孔方向
-            gx, gy = gaze_dir
-            ga = math.atan2(gy, gx)
-            half = math.radians(fov_deg) / 2.0
-            # 将方向角限制到 [a-half, a+half]
-            diff = (ga - a + math.pi) % (2 * math.pi) - math.pi
-            if diff > half:
-                ga = a + half
-            elif diff < -half:
-                ga = a - half
-            dirx, diry = math.cos(ga), math.sin(ga)
-            ox = dirx * (eye_r * 0.35)
-            oy = diry * (eye_r * 0.35)
             pupil_center = (int(cx + ox), int(cy + oy))
-            pupil_sz = int(eye_r * max(config.PUPIL_MIN, min(config.PUPIL_MAX, config.PUPIL_SCALE_BASE * pupil)))
             pygame.draw.circle(self.screen, config.EYE_PUPIL, pupil_center, pupil_sz)
 
         # 射线（仅选中时显示）
@@ -586,7 +645,7 @@ class PygameRenderer:
         prev_e = self._prev_energy.get(e.id, e.energy)
         delta_e = e.energy - prev_e
         is_spawnling = sp < 0.98
-        if e.type == "hunter":
+        if e.type_code == TYPE_HUNTER:
             pulse_amp = self._feed_pulse.get(e.id, 0.0)
             swallow_p = self._swallow_prog.get(e.id, 0.0)
             swallow_amp = self._swallow_amp.get(e.id, 0.0)
@@ -626,18 +685,22 @@ class PygameRenderer:
         self._prev_draw[e.id] = (x, y)
         self._prev_energy[e.id] = e.energy
 
-    def _draw_debug_panel(self, world: WorldState):
+    def _draw_debug_panel(self, world: WorldState, sel: Optional[EntityState] = None):
         if not self.show_debug:
             return
-        panel_h = config.PANEL_MARGIN * 2 + config.PANEL_LINE_H * 12
-        panel = pygame.Surface((config.PANEL_WIDTH, panel_h))
-        panel.set_alpha(config.PANEL_ALPHA)
-        panel.fill(config.DEBUG_PANEL_BG)
+        # 面板尺寸与底色只取决于配置：首次创建后逐帧复用
+        panel = self._debug_panel
+        if panel is None:
+            panel_h = config.PANEL_MARGIN * 2 + config.PANEL_LINE_H * 12
+            panel = pygame.Surface((config.PANEL_WIDTH, panel_h))
+            panel.set_alpha(config.PANEL_ALPHA)
+            panel.fill(config.DEBUG_PANEL_BG)
+            self._debug_panel = panel
         # 置于左上角，避免遮挡主要空间
         self.screen.blit(panel, (0, 0))
 
         def write(line: int, text: str):
-            img = self.font.render(text, True, config.DEBUG_PANEL_TEXT)
+            img = self._render_text(text, config.DEBUG_PANEL_TEXT)
             self.screen.blit(img, (config.PANEL_MARGIN, config.PANEL_MARGIN + line * config.PANEL_LINE_H))
 
         write(0, f"Tick: {world.tick} | Entities: {len(world.entities)}")
@@ -645,7 +708,6 @@ class PygameRenderer:
         write(2, f"FOV scale: {self._fov_range_scale:.2f} | Ray delta: {self._ray_count_delta}")
         write(3, "Body: soft")
 
-        sel = next((e for e in world.entities if e.id == self.selected_id), None)
         if sel:
             write(4, f"Selected: {sel.id} ({sel.type})")
             if sel.type == "hunter":
@@ -676,15 +738,16 @@ class PygameRenderer:
         best_d2 = 1e9
         for e in world.entities:
             # 仅过滤已死亡的捕食者；零能量的猎物仍可选中
-            if e.type == "hunter" and e.energy <= 0:
+            if e.type_code == TYPE_HUNTER and e.energy <= 0:
                 continue
             # 使用与绘制一致的平滑位置进行点击检测
             sx, sy, _ = self._smooth.get(e.id, (e.x, e.y, e.angle))
             d2 = (sx - x) ** 2 + (sy - y) ** 2
             # 新生成的子体半径较小，为便于调试点击，将命中半径随spawn_progress缩放并设置下限
-            scale = config.SPAWN_MIN_SCALE + (1.0 - config.SPAWN_MIN_SCALE) * float(getattr(e, "spawn_progress", 1.0))
+            sp = e.spawn_progress
+            scale = config.SPAWN_MIN_SCALE + (1.0 - config.SPAWN_MIN_SCALE) * sp
             eff_r = max(10.0, e.radius * scale)
-            if float(getattr(e, "spawn_progress", 1.0)) < 0.7:
+            if sp < 0.7:
                 eff_r += 4.0
             if d2 < best_d2 and d2 <= (eff_r + 6) ** 2:
                 best_d2 = d2
@@ -711,14 +774,9 @@ class PygameRenderer:
                 elif event.key == pygame.K_RIGHTBRACKET:
                     self._fov_range_scale = clamp(self._fov_range_scale + 0.15, 0.4, 2.4)
                 elif event.key == pygame.K_SLASH:
-                    # 切换FOV显示模式：wedge -> lines -> off -> wedge
-                    if self._fov_mode == "wedge":
-                        self._fov_mode = "lines"
-                        self._fov_range_scale = 1.0
-                    elif self._fov_mode == "lines":
-                        self._fov_mode = "off"
-                    else:
-                        self._fov_mode = "wedge"
+                    # 切换FOV显示模式：wedge -> lines -> off -> wedge（查表，未知模式回到 wedge）
+                    self._fov_mode, reset_scale = _FOV_MODE_NEXT.get(self._fov_mode, ("wedge", True))
+                    if reset_scale:
                         self._fov_range_scale = 1.0
                 elif event.key == pygame.K_n:
                     # 切换传感器条显示
@@ -746,12 +804,15 @@ class PygameRenderer:
     def draw_world(self, world: WorldState):
         # 在离屏图层绘制世界元素，之后按相机视口缩放/blit到屏幕
         W, H = config.WINDOW_WIDTH, config.WINDOW_HEIGHT
-        # 使用带透明度的离屏层，避免缩放后产生条纹/形状异常
-        world_layer = pygame.Surface((W, H), pygame.SRCALPHA)
-        try:
-            world_layer = world_layer.convert_alpha()
-        except Exception:
-            pass
+        # 使用带透明度的离屏层，避免缩放后产生条纹/形状异常；首帧创建后复用，避免每帧分配整窗画布
+        world_layer = self._world_layer
+        if world_layer is None or world_layer.get_size() != (W, H):
+            world_layer = pygame.Surface((W, H), pygame.SRCALPHA)
+            try:
+                world_layer = world_layer.convert_alpha()
+            except Exception:
+                pass
+            self._world_layer = world_layer
         # 背景与网格绘制到离屏层（不透明背景）
         world_layer.fill((*config.BG_COLOR, 255))
         step = 40
@@ -762,63 +823,102 @@ class PygameRenderer:
         # 暂存屏幕引用，并将渲染目标切到离屏层
         _real_screen = self.screen
         self.screen = world_layer
-        # 仅移除死亡的捕食者；零能量的猎物仍绘制（原地不动）
-        alive = [e for e in world.entities if not (e.type == "hunter" and e.energy <= 0.0)]
+        # 事件驱动：先处理事件，再推进成长覆盖（spawn_override）
+        self._process_events(world)
+        dt = max(0.0, self._last_dt_sec)
+        grow = config.SPAWN_GROW_RATE * dt
+        # 单次遍历：筛选存活实体（仅移除死亡的捕食者；零能量的猎物仍绘制）、收集在场 id、推进成长覆盖
+        alive: list[EntityState] = []
+        existing_ids: set[str] = set()
+        spawn_override = self._spawn_override
+        # 选中实体在同一遍历中解析，本帧内复用：sel 取存活实体中的首个匹配（相机/传感器条），
+        # sel_any 取全部实体中的首个匹配（调试面板）
+        selected_id = self.selected_id
+        sel: Optional[EntityState] = None
+        sel_any: Optional[EntityState] = None
+        for e in world.entities:
+            if sel_any is None and e.id == selected_id:
+                sel_any = e
+            if e.type_code == TYPE_HUNTER and e.energy <= 0.0:
+                continue
+            if sel is None and e.id == selected_id:
+                sel = e
+            alive.append(e)
+            existing_ids.add(e.id)
+            if e.id in spawn_override:
+                spawn_override[e.id] = min(1.0, spawn_override[e.id] + grow)
 
         # 若选中实体已不存在（被吃掉或死亡），清空选中，避免点击后看不到属性
-        if self.selected_id and not any(e.id == self.selected_id for e in alive):
+        if self.selected_id and sel is None:
             self.selected_id = None
+            sel_any = None
 
-        # 事件驱动：先处理事件，再推进成长覆盖（spawn_override）
-        self._process_events(world)
-        dt = max(0.0, getattr(self, "_last_dt_sec", 0.0))
-        for e in alive:
-            if e.id in self._spawn_override:
-                self._spawn_override[e.id] = min(1.0, self._spawn_override[e.id] + config.SPAWN_GROW_RATE * dt)
-        existing_ids = {e.id for e in alive}
-        for cid in list(self._spawn_override.keys()):
-            if cid not in existing_ids:
-                self._spawn_override.pop(cid, None)
-        # 清理兜底统计中已不在场的实体，避免内存增长
-        for k in list(self._gen_fallback.keys()):
-            if k not in existing_ids:
-                self._gen_fallback.pop(k, None)
-        for k in list(self._offspring_fallback.keys()):
-            if k not in existing_ids:
-                self._offspring_fallback.pop(k, None)
+        # 清理成长覆盖与兜底统计中已不在场的实体，避免内存增长
+        for cache in (spawn_override, self._gen_fallback, self._offspring_fallback):
+            for k in [k for k in cache if k not in existing_ids]:
+                del cache[k]
+        if self._fov_missing_logged:
+            self._fov_missing_logged.intersection_update(existing_ids)
 
         # 视线与目标映射（优先使用射线命中；否则退化为最近实体）
         nearest_map: Dict[str, Tuple[float, float, float]] = {}
+        near_grid = self._nearest_grid
+        xs: Optional[list[float]] = None
+        ys: Optional[list[float]] = None
+        n_alive = len(alive)
         for e in alive:
             fov_deg, fov_range = self._fov_params(e)
             # 默认：沿朝向看向前方
             best_vec: Tuple[float, float, float] = (math.cos(e.angle), math.sin(e.angle), fov_range)
 
             # 1) 优先使用射线命中：取距离最近的一条命中射线
+            # 单次遍历直接取最小值，不构建临时命中列表（严格小于：并列时保留首条，与 min 一致）
             hit: Optional[RayHit] = None
-            if e.rays:
-                hits = [h for h in e.rays if h.hit_id and h.distance > 0.0]
-                if hits:
-                    hit = min(hits, key=lambda h: h.distance)
+            for h in e.rays:
+                if h.hit_id and h.distance > 0.0 and (hit is None or h.distance < hit.distance):
+                    hit = h
             if hit:
                 e.target_id = hit.hit_id
                 # gaze 以射线方向为主（单位方向），距离为射线距离
                 dirx, diry = math.cos(hit.angle), math.sin(hit.angle)
                 best_vec = (dirx, diry, min(hit.distance, fov_range))
             else:
-                # 2) 回退：最近实体（欧氏距离）
-                best_d2 = 1e12
+                # 2) 回退：最近实体（欧氏距离）；循环内只比较距离平方，找到最近者后再开方
+                # 网格按需构建（本帧首个需要回退的实体时），查询半径逐步倍增直至找到最近者
+                if xs is None:
+                    xs = [o.x for o in alive]
+                    ys = [o.y for o in alive]
+                    near_grid.rebuild(xs, ys)
                 best_tid: Optional[str] = None
-                for o in alive:
-                    if o.id == e.id:
-                        continue
-                    dx = (o.x - e.x)
-                    dy = (o.y - e.y)
-                    d2 = dx * dx + dy * dy
-                    if d2 < best_d2:
-                        best_d2 = d2
-                        best_tid = o.id
-                        best_vec = (dx, dy, math.sqrt(max(0.0, d2)))
+                best_dx = best_dy = 0.0
+                ex, ey = e.x, e.y
+                radius = near_grid.cell_size
+                while True:
+                    # 查询框覆盖的格子数超过实体数时，网格不再划算：直接全量遍历
+                    span = 2.0 * radius / near_grid.cell_size + 1.0
+                    if span * span > n_alive:
+                        cands = range(n_alive)
+                    else:
+                        cands = near_grid.query(ex, ey, radius)
+                    best_d2 = 1e12
+                    best_tid = None
+                    for j in cands:
+                        o = alive[j]
+                        if o.id == e.id:
+                            continue
+                        dx = (xs[j] - ex)
+                        dy = (ys[j] - ey)
+                        d2 = dx * dx + dy * dy
+                        if d2 < best_d2:
+                            best_d2 = d2
+                            best_tid = o.id
+                            best_dx, best_dy = dx, dy
+                    # 查询圆内的实体必然都在候选中：最近者落在圆内即为全局最近；候选已覆盖全部实体时结束
+                    if (best_tid is not None and best_d2 <= radius * radius) or len(cands) == n_alive:
+                        break
+                    radius *= 2.0
+                if best_tid is not None:
+                    best_vec = (best_dx, best_dy, math.sqrt(best_d2))
                 e.target_id = best_tid
             nearest_map[e.id] = best_vec
 
@@ -835,8 +935,7 @@ class PygameRenderer:
         sx = W // 2
         sy = H // 2
         if self.selected_id:
-            target_scale = float(getattr(config, "CAMERA_ZOOM_SELECTED", 1.8))
-            sel = next((e for e in alive if e.id == self.selected_id), None)
+            target_scale = self._cam_zoom_selected
             if sel:
                 sx, sy, _ = self._smooth.get(sel.id, (sel.x, sel.y, sel.angle))
         # 平滑缩放
@@ -852,11 +951,9 @@ class PygameRenderer:
         self.screen.blit(scaled, (0, 0))
 
         # 选中实体的传感器条与调试面板（叠加在相机后的屏幕上，不参与缩放）
-        if self.selected_id:
-            sel = next((x for x in alive if x.id == self.selected_id), None)
-            if sel:
-                self._draw_sensor_strip(sel)
-        self._draw_debug_panel(world)
+        if sel:
+            self._draw_sensor_strip(sel)
+        self._draw_debug_panel(world, sel_any)
 
         # 叠加外部动作帧复现（在所有元素之上绘制）
         if self._ghost_frames:
@@ -875,7 +972,7 @@ class PygameRenderer:
             gspeed = math.hypot(gx - px, gy - py) * self._ghost_rate
             ghost_color = (255, 255, 255)
             # 幽灵主体：仅使用软体绘制
-            g_r = getattr(config, "DEFAULT_RADIUS", 10.0)
+            g_r = self._ghost_radius
             ge = SimpleNamespace(id="ghost", speed=gspeed, angular_velocity=0.0, radius=g_r)
             self._draw_soft_body(ge, gx, gy, ga, g_r, ghost_color)
 
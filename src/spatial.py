@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Sequence, Tuple
+
+
+class SpatialHash:
+    """均匀网格空间哈希：按格子分桶存放点索引，用于邻域查询的粗筛（broad-phase）。
+
+    - rebuild(xs, ys, max_extent) 每帧整体重建；max_extent 为对象自身的最大半径（点对象为 0）
+    - query(x, y, radius) 返回可能与查询圆相交的对象索引（升序），精确判定由调用方完成
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size 必须为正数")
+        self.cell_size = float(cell_size)
+        self._inv = 1.0 / self.cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._max_extent = 0.0
+
+    def rebuild(self, xs: Sequence[float], ys: Sequence[float], max_extent: float = 0.0) -> None:
+        inv = self._inv
+        floor = math.floor
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            key = (floor(x * inv), floor(y * inv))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [i]
+            else:
+                bucket.append(i)
+        self._cells = cells
+        self._max_extent = max(0.0, float(max_extent))
+
+    def query(self, x: float, y: float, radius: float) -> List[int]:
+        reach = radius + self._max_extent
+        inv = self._inv
+        floor = math.floor
+        cx0, cx1 = floor((x - reach) * inv), floor((x + reach) * inv)
+        cy0, cy1 = floor((y - reach) * inv), floor((y + reach) * inv)
+        cells = self._cells
+        out: List[int] = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    out.extend(bucket)
+        # 保持与原始实体顺序一致，使结果与全量遍历完全相同
+        out.sort()
+        return out